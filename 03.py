@@ -53,9 +53,19 @@
 # input.  We accommodate the possibility that two instances of a part
 # number are adjacent to the same symbol (though this never happens in
 # our input).
+#
+# Adjacency only ever involves the rows immediately above and below,
+# so rather than loading the whole schematic we stream it through a
+# three-row window.  Each number is checked against the window as its
+# row passes through the middle, and is emitted if it is a part
+# number.  Part numbers adjacent to * symbols are also recorded
+# against those symbols, and once a symbol's row has left the window
+# no further numbers can be adjacent to it, so the symbol is resolved
+# as a gear (or not) and forgotten.  Only these open gear candidates
+# are kept in memory.
 
 from collections import defaultdict
-from functools import reduce
+from itertools import chain
 import re
 
 pattern = re.compile(r"\d+")
@@ -63,33 +73,42 @@ pattern = re.compile(r"\d+")
 def is_symbol(c):
     return not (c.isdigit() or c == ".")
 
-grid = [line.strip() for line in open("03.in")]
-R, C = len(grid), len(grid[0])  # grid dimensions
-
-# Adjacency sparse matrix: maps a symbol location (row, col) to a set
-# of adjacent part numbers, each described by
-# (row, start_col, end_col).
-adj = defaultdict(lambda: set())
+def scan(lines):
+    """Stream a schematic, yielding ("part", part_number) for each part
+    number and ("gear", gear_ratio) for each gear.
+    """
+    # Open gear candidates: maps a * location (row, col) to a list of
+    # adjacent part numbers.
+    gears = defaultdict(list)
+    above, row = "", None
+    r = -1  # index of row
+    for below in chain((line.strip() for line in lines), [""]):
+        if row != None:
+            for m in pattern.finditer(row):
+                n = int(m.group())
+                is_part = False
+                for nr, s in [(r-1, above), (r, row), (r+1, below)]:
+                    lo, hi = max(m.start()-1, 0), min(m.end()+1, len(s))
+                    for nc in range(lo, hi):
+                        if is_symbol(s[nc]):
+                            is_part = True
+                            if s[nc] == "*":
+                                gears[(nr, nc)].append(n)
+                if is_part:
+                    yield "part", n
+            # Row r-1 is leaving the window, so its gears are complete.
+            for g in [g for g in gears if g[0] == r-1]:
+                yield from resolve(gears.pop(g))
+        above, row = row or "", below
+        r += 1
+    for parts in gears.values():
+        yield from resolve(parts)
 
-for r in range(R):
-    i = 0
-    while True:
-        m = pattern.search(grid[r], pos=i)
-        if m == None:
-            break
-        for nr in [r-1, r, r+1]:
-            for nc in range(m.start()-1, m.end()+1):
-                if nr in range(R) and nc in range(C):
-                    if is_symbol(grid[nr][nc]):
-                        adj[(nr, nc)].add((r, m.start(), m.end()))
-        i = m.end()
+def resolve(parts):
+    if len(parts) == 2:
+        yield "gear", parts[0]*parts[1]
 
-print(
-    sum(
-        int(grid[row][start_col:end_col])
-        for row, start_col, end_col in reduce(set.union, adj.values())
-    )
-)
+print(sum(v for kind, v in scan(open("03.in")) if kind == "part"))
 
 # --- Part Two ---
 #
@@ -136,18 +155,4 @@ print(
 #
 # What is the sum of all of the gear ratios in your engine schematic?
 
-from operator import mul
-
-print(
-    sum(
-        reduce(
-            mul,
-            [
-                int(grid[row][start_col:end_col])
-                for row, start_col, end_col in s
-            ]
-        )
-        for (r, c), s in adj.items()
-        if grid[r][c] == "*" and len(s) == 2
-    )
-)
+print(sum(v for kind, v in scan(open("03.in")) if kind == "gear"))
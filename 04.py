@@ -66,19 +66,30 @@
 #
 # Take a seat in the large pile of colorful cards.  How many points
 # are they worth in total?
+#
+# --------------------
+#
+# Each list of numbers is encoded as an integer bitmask (bit n is set
+# if number n is present), so that counting matches is just a matter
+# of counting the bits in the intersection.  This assumes no number is
+# repeated within a list, which holds for our input.
+
+def bitmask(numbers):
+    mask = 0
+    for n in numbers:
+        mask |= 1 << int(n)
+    return mask
 
-num_wins = []
-for line in open("04.in"):
-    winning, have = [set(s.split()) for s in line.split(":")[1].split("|")]
-    num_wins.append(sum(n in winning for n in have))
+def cards(lines):
+    """Stream cards, yielding for each card a tuple (number of winning
+    numbers, number of matches).
+    """
+    for line in lines:
+        winning, have = [s.split() for s in line.split(":")[1].split("|")]
+        yield len(winning), (bitmask(winning) & bitmask(have)).bit_count()
 
-print(
-    sum(
-        2**(n-1)
-        for n in num_wins
-        if n > 0
-    )
-)
+# Both parts are computed in a single pass over the cards; the answer
+# to this part is printed below.
 
 # --- Part Two ---
 #
@@ -136,9 +147,48 @@ print(
 # Process all of the original and copied scratchcards until no more
 # scratchcards are won.  Including the original set of scratchcards,
 # how many total scratchcards do you end up with?
+#
+# --------------------
+#
+# Card i adds its instance count to each of the next n cards, where n
+# is its number of matches, i.e., to a contiguous block.  Rather than
+# touch each card in the block, we record the addition at the start of
+# the block and the matching subtraction just past its end in a
+# difference array; a running sum over the array then gives the number
+# of copies of each card as we reach it.  This is linear in the number
+# of cards regardless of how many matches they have.
+#
+# Furthermore, a card can have no more matches than it has winning
+# numbers, so only that many entries past the current card can be
+# pending at any time.  The difference array is therefore kept in a
+# ring buffer of that size plus one, and memory is bounded by the
+# number of winning numbers rather than the number of cards.  Should a
+# card list more winning numbers than any before it, the ring is grown,
+# keeping the pending entries in order.
+
+def play(cards):
+    """Yield (number of matches, number of instances) for each card."""
+    ring = [0]
+    copies = 0
+    for i, (num_winning, n) in enumerate(cards):
+        if num_winning+1 > len(ring):
+            # Entries for cards i, i+1, ... move to their new slots.
+            grown = [0]*(num_winning+1)
+            for k in range(len(ring)):
+                grown[(i+k)%len(grown)] = ring[(i+k)%len(ring)]
+            ring = grown
+        slot = i%len(ring)
+        copies += ring[slot]
+        ring[slot] = 0  # slot now stands for card i+len(ring)
+        reps = 1 + copies  # instances of card i
+        ring[(i+1)%len(ring)] += reps
+        ring[(i+n+1)%len(ring)] -= reps
+        yield n, reps
 
-reps = [1]*len(num_wins)
-for i in range(len(num_wins)):
-    for j in range(num_wins[i]):
-        reps[i+j+1] += reps[i]
-print(sum(reps))
+points = total = 0
+for n, reps in play(cards(open("04.in"))):
+    if n > 0:
+        points += 2**(n-1)
+    total += reps
+print(points)
+print(total)
@@ -156,35 +156,107 @@
 # --------------------
 #
 # For convenience we assume the maps are listed in order in the input.
+#
+# A piecewise linear map is stored as a sorted list of segments, with
+# the gaps between the almanac's ranges filled in with identity
+# segments, so that the segments exactly cover all nonnegative values.
+# Looking up a value is then a binary search over the segment starts.
+# Better yet, two such maps can be composed into a single equivalent
+# map by splitting the image of each segment of the first map at the
+# breakpoints of the second.  Composing the whole chain of maps gives
+# a single seed-to-location map, and mapping a seed costs one binary
+# search regardless of the number of maps.
+#
+# Seeds are read in fixed-size chunks into arrays of 64-bit integers,
+# so that a seed list too large to load can be streamed through the
+# map.  Each seed is still mapped individually by a binary search;
+# sorting a chunk to sweep it against the segments in a single merge
+# pass measures slower than the searches it replaces.
 
+from array import array
+from bisect import bisect_right
 from collections import namedtuple
+from functools import reduce
+from itertools import islice
+from math import inf
 
 LinearMap = namedtuple("LinearMap", "start stop delta")
 
 class PiecewiseLinearMap:
 
-    def __init__(self, s):
+    def __init__(self, lmaps):
         self.lmaps = []
-        for line in s.splitlines()[1:]:
-            a, b, c = map(int, line.split())
-            self.lmaps.append(LinearMap(b, b+c, a-b))
+        v = 0
+        for lm in sorted(lmaps) + [LinearMap(inf, inf, 0)]:
+            if lm.start > v:
+                self._append(LinearMap(v, lm.start, 0))
+            if lm.start < lm.stop:
+                self._append(lm)
+            v = lm.stop
+        self.starts = [lm.start for lm in self.lmaps]
+
+    def _append(self, lm):
+        # Append a segment contiguous with the last, merging the two if
+        # they have the same delta.
+        if len(self.lmaps) > 0 and self.lmaps[-1].delta == lm.delta:
+            self.lmaps[-1] = LinearMap(self.lmaps[-1].start, lm.stop, lm.delta)
+        else:
+            self.lmaps.append(lm)
 
     def map(self, v):
+        return v+self.lmaps[bisect_right(self.starts, v)-1].delta
+
+    def compose(self, other):
+        """Return the map equivalent to applying this map and then the
+        other.
+        """
+        lmaps = []
         for lm in self.lmaps:
-            if lm.start <= v < lm.stop:
-                return v+lm.delta
-        return v
+            lo, hi = lm.start+lm.delta, lm.stop+lm.delta
+            i = bisect_right(other.starts, lo)-1
+            while i < len(other.lmaps) and other.lmaps[i].start < hi:
+                olm = other.lmaps[i]
+                lmaps.append(
+                    LinearMap(
+                        max(lo, olm.start)-lm.delta,
+                        min(hi, olm.stop)-lm.delta,
+                        lm.delta+olm.delta
+                    )
+                )
+                i += 1
+        return PiecewiseLinearMap(lmaps)
+
+def parse_map(s):
+    lmaps = []
+    for line in s.splitlines()[1:]:
+        a, b, c = map(int, line.split())
+        lmaps.append(LinearMap(b, b+c, a-b))
+    return PiecewiseLinearMap(lmaps)
+
+def read_seeds(tokens, chunk_size=1<<16):
+    """Read seed numbers from an iterable of strings, yielding arrays of
+    up to chunk_size seeds at a time.
+    """
+    tokens = iter(tokens)
+    while len(chunk := array("q", map(int, islice(tokens, chunk_size)))) > 0:
+        yield chunk
 
 parts = open("05.in").read().split("\n\n")
 seeds = [int(v) for v in parts[0].split(":")[1].split()]
-plmaps = [PiecewiseLinearMap(p) for p in parts[1:]]
+plmaps = [parse_map(p) for p in parts[1:]]
+seed_to_location = reduce(PiecewiseLinearMap.compose, plmaps)
 
 def apply_all_maps(v, fn=PiecewiseLinearMap.map):
     for plm in plmaps:
         v = fn(plm, v)
     return v
 
-print(min(apply_all_maps(v) for v in seeds))
+print(
+    min(
+        min(map(seed_to_location.map, chunk))
+        for chunk in read_seeds(parts[0].split(":")[1].split())
+    )
+)
 
 # --- Part Two ---
 #
@@ -215,35 +287,104 @@ print(min(apply_all_maps(v) for v in seeds))
 # Consider all of the initial seed numbers listed in the ranges on the
 # first line of the almanac.  What is the lowest location number that
 # corresponds to any of the initial seed numbers?
+#
+# --------------------
+#
+# Ranges of values are mapped by a merge sweep.  The input ranges are
+# sorted and coalesced into disjoint ranges, and then walked in step
+# with the map's (sorted) segments, each range being cut wherever it
+# crosses a segment boundary.  The output ranges are coalesced in turn,
+# so the number of ranges carried from one map to the next stays as
+# small as possible.
+
+def coalesce(ranges):
+    # Return a minimal sorted list of disjoint ranges covering the same
+    # values as the given ranges.
+    out = []
+    for r in sorted(ranges, key=lambda r: r.start):
+        if len(r) == 0:
+            continue
+        if len(out) > 0 and r.start <= out[-1].stop:
+            out[-1] = range(out[-1].start, max(out[-1].stop, r.stop))
+        else:
+            out.append(r)
+    return out
 
 def map_ranges(plm, ranges):
     # Map ranges of values to ranges of values.
-    in_ = ranges[:]
     out = []
-    while len(in_) > 0:
-        r = in_.pop()
-        found_intersection = False
-        for lm in plm.lmaps:
-            if r.start < lm.stop and lm.start < r.stop:
-                found_intersection = True
-                out.append(
-                    range(
-                        max(r.start+lm.delta, lm.start+lm.delta),
-                        min(r.stop+lm.delta, lm.stop+lm.delta)
-                    )
+    i = 0
+    for r in coalesce(ranges):
+        while plm.lmaps[i].stop <= r.start:
+            i += 1
+        while True:
+            lm = plm.lmaps[i]
+            out.append(
+                range(
+                    max(r.start, lm.start)+lm.delta,
+                    min(r.stop, lm.stop)+lm.delta
                 )
-                if r.start < lm.start:
-                    in_.append(range(r.start, lm.start))
-                if r.stop > lm.stop:
-                    in_.append(range(lm.stop, r.stop))
-                break
-        if not found_intersection:
-            out.append(r)
-    return out
+            )
+            if lm.stop >= r.stop:
+                break  # the segment may also intersect the next range
+            i += 1
+    return coalesce(out)
 
 seed_ranges = [
     range(seeds[i], seeds[i]+seeds[i+1])
     for i in range(0, len(seeds), 2)
 ]
 
-print(min(r.start for r in apply_all_maps(seed_ranges, fn=map_ranges)))
+# Alternatively, we can search backwards from the locations.  Sorting
+# the segments of the composed seed-to-location map by the start of
+# their images inverts the map: walking them in that order visits
+# location breakpoints in ascending order.  Each segment's domain is
+# intersected with the seed ranges to give runs of reachable
+# locations, and a heap of such runs yields locations in ascending
+# order.  A segment is examined only once no lower location remains
+# pending, so finding the lowest location, or the k lowest, examines
+# only as many breakpoints as needed.  (The location of any particular
+# seed is just seed_to_location.map(seed).)
+#
+# Run with --check to cross-check the answer against the forward range
+# mapping above.
+
+from heapq import heappush, heappop
+import sys
+
+def lowest_locations(plm, ranges):
+    """Yield the locations of all values in the given ranges in
+    ascending order.
+    """
+    segments = sorted(plm.lmaps, key=lambda lm: lm.start+lm.delta)
+    ranges = coalesce(ranges)
+    starts = [r.start for r in ranges]
+    runs = []  # heap of (start, stop) location runs
+    i = 0
+    while True:
+        while i < len(segments) and (
+            len(runs) == 0 or segments[i].start+segments[i].delta <= runs[0][0]
+        ):
+            lm = segments[i]
+            j = max(bisect_right(starts, lm.start)-1, 0)
+            while j < len(ranges) and ranges[j].start < lm.stop:
+                lo = max(ranges[j].start, lm.start)
+                hi = min(ranges[j].stop, lm.stop)
+                if lo < hi:
+                    heappush(runs, (lo+lm.delta, hi+lm.delta))
+                j += 1
+            i += 1
+        if len(runs) == 0:
+            return
+        lo, hi = heappop(runs)
+        yield lo
+        if lo+1 < hi:
+            heappush(runs, (lo+1, hi))
+
+location = next(lowest_locations(seed_to_location, seed_ranges))
+print(location)
+
+if "--check" in sys.argv[1:]:
+    forward = min(r.start for r in apply_all_maps(seed_ranges, fn=map_ranges))
+    if forward != location:
+        sys.exit(f"forward range mapping gives {forward}")
@@ -97,8 +97,20 @@
 #
 # Determine the number of ways you could beat the record in each race.
 # What do you get if you multiply these numbers together?
+#
+# --------------------
+#
+# Holding the button for t milliseconds travels (T-t)*t millimeters in
+# a race of time T, so this is a quadratic equation (an inverted
+# parabola) and we're looking for the number of integer solutions
+# between the two roots of (T-t)*t - D = 0, where D is the record
+# distance.  Floating point square roots lose precision for large T
+# and D, so instead we estimate the lower root with an integer square
+# root and correct the estimate by checking the boundary directly.
+# This is exact for integers of any size.  The parabola is symmetric,
+# so the upper root follows from the lower.  We assume D >= 0.
 
-from math import prod
+from math import isqrt, prod
 import re
 
 with open("06.in") as f:
@@ -106,12 +118,24 @@ with open("06.in") as f:
     best_distances = map(int, re.findall(r"\d+", f.readline()))
 
 def num_ways(race_time, best_distance):
-    return sum(
-        d > best_distance
-        for d in [(race_time-t)*t for t in range(1, race_time)]
-    )
+    T, D = race_time, best_distance
+    disc = T*T - 4*D
+    if disc <= 0:
+        return 0
+    lo = (T - isqrt(disc))//2
+    while lo > 0 and (T-lo+1)*(lo-1) > D:
+        lo -= 1
+    while lo <= T//2 and (T-lo)*lo <= D:
+        lo += 1
+    return max(T - 2*lo + 1, 0)
 
-print(prod(num_ways(t, bd) for t, bd in zip(times, best_distances)))
+def num_ways_all(races):
+    """Return the number of ways to win each of an iterable of
+    (race time, best distance) races.
+    """
+    return [num_ways(t, bd) for t, bd in races]
+
+print(prod(num_ways_all(zip(times, best_distances))))
 
 # --- Part Two ---
 #
@@ -140,19 +164,10 @@ print(prod(num_ways(t, bd) for t, bd in zip(times, best_distances)))
 #
 # --------------------
 #
-# It takes only 4 seconds to compute the solution using the above
-# code, but it's easy to solve this analytically as it's just a
-# quadratic equation (an inverted parabola) and we're looking for the
-# number of integer solutions between the two roots.
-
-from math import sqrt, floor, ceil
+# The solution above applies directly.
 
 with open("06.in") as f:
     T = int(f.readline().split(":")[1].replace(" ", ""))
     D = int(f.readline().split(":")[1].replace(" ", ""))
 
-# Equation is (T-t)*t - D = 0.
-
-roots = [(-T + sqrt(T*T-4*D))/(-2), (-T - sqrt(T*T-4*D))/(-2)]
-roots.sort()
-print(floor(roots[1]) - ceil(roots[0]) + 1)
+print(num_ways(T, D))
@@ -105,26 +105,133 @@
 #
 # Find the rank of every hand in your set.  What are the total
 # winnings?
+#
+# --------------------
+#
+# Each hand is encoded as a single integer sort key: the hand's type
+# class in the high bits, followed by 4 bits per card giving the
+# card's strength, in order.  Comparing keys then compares types
+# first and breaks ties card by card.
+#
+# A hand's type depends only on its card repetition counts.  If the
+# counts are listed in descending order (e.g., a full house is [3,
+# 2]), lexicographic order of the lists matches the order of the
+# types.  Conveniently, summing hand.count(c) over the cards c in a
+# hand gives the sum of the squares of the counts, which is distinct
+# for each way of partitioning 5 cards, so we can look up the type in
+# a table precomputed over all partitions, without building a Counter
+# or sorting the counts.  The table is keyed by the number of jokers
+# as well (see part 2); without jokers that number is just zero.
+#
+# Winnings depend only on each hand's rank and bid, so the hands need
+# not all be held in memory.  We perform an external merge sort: (key,
+# bid) pairs are sorted in fixed-size runs that are spilled to a
+# temporary file, and the runs are then merged, accumulating rank *
+# bid as hands emerge from the merge in order.  To keep memory and
+# open files bounded no matter how many runs there are, at most
+# fan_in runs are merged at once, in as many passes as needed, each
+# pass writing its merged runs to a new temporary file.  The runs in a
+# file are all read through the one file object, seeking to each run's
+# position before each read, so a pass needs just two open files, and
+# each run being merged is read through a buffer sized to split a
+# fixed memory budget (in pairs) among the runs.
+
+from array import array
+from heapq import merge
+import os
+from tempfile import TemporaryFile
 
-from collections import Counter
+def partitions(n, max_part=None):
+    # Generate the partitions of n as tuples in descending order.
+    if n == 0:
+        yield ()
+        return
+    for k in range(min(n, max_part or n), 0, -1):
+        for p in partitions(n-k, k):
+            yield (k,) + p
+
+# Maps (number of jokers, sum of squared counts of the other cards) to
+# a type class, 0 (high card) through 6 (five of a kind).
+types = {}
+for j in range(6):
+    for p in partitions(5-j):
+        # Jokers join the most frequent card.
+        types[(j, sum(k*k for k in p))] = (p[0]+j,)+p[1:] if j < 5 else (5,)
+classes = sorted(set(types.values()))
+types = {s: classes.index(t) for s, t in types.items()}
 
 strength = "23456789TJQKA"
+joker = None
+
+def key(hand, card_values):
+    j = hand.count(joker) if joker else 0
+    k = types[(j, sum(hand.count(c) for c in hand if c != joker))]
+    for c in hand:
+        k = k<<4 | card_values[c]
+    return k
+
+def spill(pairs, f, chunk_size=1<<16):
+    # Append (key, bid) pairs, in order, to the end of a file.  Return
+    # the run's location in the file as (offset, number of pairs).
+    f.seek(0, os.SEEK_END)
+    offset, n = f.tell(), 0
+    chunk = array("q")
+    for k, bid in pairs:
+        chunk.append(k)
+        chunk.append(bid)
+        if len(chunk) == 2*chunk_size:
+            chunk.tofile(f)
+            n += chunk_size
+            chunk = array("q")
+    chunk.tofile(f)
+    return offset, n + len(chunk)//2
 
-def type(hand):
-    # Return a hand's type as a list of card repetition counts in
-    # descending order, e.g., a full house is [3, 2].
-    return sorted(Counter(hand).values(), reverse=True)
+def read_run(f, run, chunk_size):
+    offset, n = run
+    while n > 0:
+        k = min(n, chunk_size)
+        a = array("q")
+        f.seek(offset)
+        a.frombytes(f.read(k*2*a.itemsize))
+        offset += k*2*a.itemsize
+        n -= k
+        it = iter(a)
+        yield from zip(it, it)
 
-def rank(hand):
-    return [strength.index(c) for c in hand]
+def merge_runs(f, runs, memory):
+    chunk_size = max(1, memory//max(len(runs), 1))
+    return merge(*(read_run(f, run, chunk_size) for run in runs))
 
-def solve():
-    handbids = []
+def solve(run_size=1<<20, fan_in=64, memory=1<<20):
+    card_values = {c: i for i, c in enumerate(strength)}
+    f = TemporaryFile()
+    runs, run = [], []
     for line in open("07.in"):
         hand, bid = line.split()
-        handbids.append((type(hand), rank(hand), int(bid)))
-    handbids.sort()
-    return sum(hb[2]*i for i, hb in enumerate(handbids, start=1))
+        run.append((key(hand, card_values), int(bid)))
+        if len(run) == run_size:
+            run.sort()
+            runs.append(spill(run, f))
+            run = []
+    if len(run) > 0:
+        run.sort()
+        runs.append(spill(run, f))
+    f.flush()
+    while len(runs) > fan_in:
+        g = TemporaryFile()
+        runs = [
+            spill(merge_runs(f, runs[i:i+fan_in], memory), g)
+            for i in range(0, len(runs), fan_in)
+        ]
+        g.flush()
+        f.close()
+        f = g
+    winnings = sum(
+        bid*i
+        for i, (_, bid) in enumerate(merge_runs(f, runs, memory), start=1)
+    )
+    f.close()
+    return winnings
 
 print(solve())
 
@@ -170,14 +277,9 @@ print(solve())
 # Hand strength is always maximized by turning jokers into the
 # most-frequently occurring card.
 
-strength = "J23456789TQKA"
+# This is already built into the type table above.
 
-def type(hand):
-    c = Counter(hand)
-    if 0 < c["J"] < 5:
-        nj = c["J"]
-        del c["J"]
-        c[c.most_common(1)[0][0]] += nj
-    return sorted(c.values(), reverse=True)
+strength = "J23456789TQKA"
+joker = "J"
 
 print(solve())
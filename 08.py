@@ -52,8 +52,30 @@
 #
 # Starting at AAA, follow the left/right instructions.  How many steps
 # are required to reach ZZZ?
+#
+# --------------------
+#
+# The network is compiled into integer arrays: nodes are numbered, and
+# succ[0][v] and succ[1][v] are the nodes to the left and right of
+# node v.  Following the entire instruction list once from each node
+# gives a "period" table, and from it binary lifting jump tables: the
+# k-th table maps each node to the node reached after 2^k periods, and
+# is obtained by applying the previous table twice.  A walk of any
+# number of steps can then be advanced a power of two periods at a
+# time.
+#
+# To find when a walk first reaches a target, we also record, for each
+# node, how many steps into a period starting at that node a target is
+# first reached (if at all), and build companion tables recording
+# whether a target is reached at all within 2^k periods.  Descending
+# through the tables skips over all the periods in which no target is
+# reached.  If none is reached within N periods, where N is the number
+# of nodes, then none ever will be, as the walk only repeats after
+# that.  Building these tables takes O(N*L) steps, where L is the
+# length of the instruction list, so they are cached per set of
+# targets (as the jump tables are cached by k); each query after the
+# first for the same targets is then a descent of O(log N) steps.
 
-from collections import namedtuple
 import re
 
 with open("08.in") as f:
@@ -64,22 +86,87 @@ with open("08.in") as f:
         a, b, c = re.findall(r"[A-Z]{3}", line)
         graph[a] = [b, c]
 
-class Node(namedtuple("Node_base", "label i")):
-    """A Node encompasses a label and where we are in the
-    instruction list."""
+labels = list(graph.keys())
+index = {label: v for v, label in enumerate(labels)}
+N = len(labels)
+succ = [[index[graph[label][d]] for label in labels] for d in [0, 1]]
+moves = [0 if c == "L" else 1 for c in instructions]
+L = len(moves)
+
+def walk(v, moves):
+    for d in moves:
+        v = succ[d][v]
+    return v
+
+jumps = [[walk(v, moves) for v in range(N)]]
+
+def jump(k):
+    # Return the table mapping each node to the node reached after 2^k
+    # periods.
+    while len(jumps) <= k:
+        j = jumps[-1]
+        jumps.append([j[j[v]] for v in range(N)])
+    return jumps[k]
+
+K = N.bit_length()  # 2^K > N
+
+def position(start, n):
+    """Return the label of the node reached n steps from a starting
+    label.
+    """
+    v = index[start]
+    q, r = divmod(n, L)
+    k = 0
+    while q > 0:
+        if q&1:
+            v = jump(k)[v]
+        q >>= 1
+        k += 1
+    return labels[walk(v, moves[:r])]
+
+hit_tables = {}
 
-    def next(self):
-        return Node(
-            graph[self.label][0 if instructions[self.i] == "L" else 1],
-            (self.i+1)%len(instructions)
-        )
+def hit_table(targets):
+    # Return (first_hit, hits) for a set of target nodes: the number of
+    # steps into a period starting at each node at which a target is
+    # first reached (0 if none is), and the tables recording whether a
+    # target is reached within 2^k periods, for k up to K.
+    key = frozenset(targets)
+    if key not in hit_tables:
+        first_hit = []
+        for u in range(N):
+            h = 0
+            for i, d in enumerate(moves, start=1):
+                u = succ[d][u]
+                if u in key:
+                    h = i
+                    break
+            first_hit.append(h)
+        hits = [[h > 0 for h in first_hit]]
+        for k in range(1, K+1):
+            h, j = hits[-1], jump(k-1)
+            hits.append([h[u] or h[j[u]] for u in range(N)])
+        hit_tables[key] = first_hit, hits
+    return hit_tables[key]
 
-node = Node("AAA", 0)
-n = 0
-while node.label != "ZZZ":
-    node = node.next()
-    n += 1
-print(n)
+def steps_to(start, targets):
+    """Return the number of steps from a starting label until a label in
+    targets is first reached, or None if never.
+    """
+    v = index[start]
+    if start in targets:
+        return 0
+    first_hit, hits = hit_table(index[t] for t in targets)
+    if not hits[K][v]:
+        return None
+    n = 0
+    for k in range(K-1, -1, -1):
+        if not hits[k][v]:
+            v = jump(k)[v]
+            n += 1<<k
+    return n*L + first_hit[v]
+
+print(steps_to("AAA", {"ZZZ"}))
 
 # --- Part Two ---
 #
@@ -168,23 +255,115 @@ print(n)
 # a terminal node exactly every N steps.  Thus all paths first
 # simultaneously land on their terminal nodes at the least common
 # multiple of their cycle lengths.
+#
+# But we don't rely on any of that, and solve the general case.  We
+# look for cycles at period boundaries (where the instruction list
+# starts over), where the state of a path is just its node, so the
+# period table serves as the path's successor function.  Brent's
+# algorithm finds the length of the prefix and the cycle in periods
+# using constant memory.  Walking the prefix and then one cycle gives
+# the steps at which the path lands on a terminal node: finitely many
+# in the prefix, and a set of offsets within the cycle that recur
+# every cycle length steps thereafter.
+#
+# A simultaneous landing before every path has entered its cycle must
+# be one of the finitely many prefix landings of the path with the
+# longest prefix, and we simply check each of those.  After that, the
+# paths are periodic, and the landing times of each path form a set of
+# residues modulo its cycle length.  Combining paths one at a time by
+# the generalized Chinese remainder theorem yields the set of residues
+# modulo the least common multiple of all cycle lengths at which all
+# paths land simultaneously, and the first such time past the longest
+# prefix is the answer.
+#
+# The paths are analyzed independently, so we distribute them over a
+# pool of worker processes, one per path at most.  The workers are
+# forked, and so share the compiled network read-only without copying
+# it; where forking isn't available, the paths are analyzed serially.
+
+from math import gcd, lcm
+from multiprocessing import cpu_count, get_all_start_methods, get_context
+
+is_terminal = [label.endswith("Z") for label in labels]
+
+def find_cycle(v):
+    # Return (prefix length, cycle length) of the sequence v, f(v),
+    # f(f(v)), ..., where f is the period table.
+    f = jump(0)
+    power = lam = 1
+    tortoise, hare = v, f[v]
+    while tortoise != hare:
+        if power == lam:
+            tortoise = hare
+            power *= 2
+            lam = 0
+        hare = f[hare]
+        lam += 1
+    tortoise = hare = v
+    for _ in range(lam):
+        hare = f[hare]
+    mu = 0
+    while tortoise != hare:
+        tortoise, hare = f[tortoise], f[hare]
+        mu += 1
+    return mu, lam
+
+def analyze(start):
+    """Return (prefix, cycle, prefix_hits, cycle_hits) for a path from a
+    starting label: the prefix and cycle lengths in steps, the steps
+    within the prefix at which the path is on a terminal node, and
+    likewise the steps within the first cycle.
+    """
+    v = index[start]
+    mu, lam = find_cycle(v)
+    hits = [[], []]
+    t = 0
+    for part, num_periods in enumerate([mu, lam]):
+        for _ in range(num_periods):
+            for d in moves:
+                if is_terminal[v]:
+                    hits[part].append(t)
+                v = succ[d][v]
+                t += 1
+    return mu*L, lam*L, hits[0], hits[1]
+
+def crt(r1, m1, r2, m2):
+    # Return (r, m) such that x = r1 mod m1 and x = r2 mod m2 if and
+    # only if x = r mod m, or None if there is no solution.
+    g = gcd(m1, m2)
+    if (r2-r1)%g != 0:
+        return None
+    m = m1//g*m2
+    k = (r2-r1)//g * pow(m1//g, -1, m2//g) % (m2//g)
+    return (r1 + k*m1)%m, m
+
+def solve(starts):
+    if "fork" in get_all_start_methods():
+        processes = max(1, min(len(starts), cpu_count()))
+        with get_context("fork").Pool(processes) as pool:
+            paths = pool.map(analyze, starts)
+    else:
+        paths = list(map(analyze, starts))
+    def lands(t, path):
+        prefix, cycle, prefix_hits, cycle_hits = path
+        if t < prefix:
+            return t in prefix_hits
+        return prefix + (t-prefix)%cycle in cycle_hits
+    longest = max(paths, key=lambda p: p[0])
+    for t in longest[2]:
+        if all(lands(t, p) for p in paths):
+            return t
+    residues, modulus = {0}, 1
+    for prefix, cycle, _, cycle_hits in paths:
+        combined = set()
+        for r1 in residues:
+            for t in cycle_hits:
+                if (c := crt(r1, modulus, t%cycle, cycle)) != None:
+                    combined.add(c[0])
+        if len(combined) == 0:
+            return None
+        residues, modulus = combined, lcm(modulus, cycle)
+    start = longest[0]
+    return min(r + (start-r+modulus-1)//modulus*modulus for r in residues)
 
-from math import lcm
-
-def cycle_len(start):
-    seen = {}
-    node = start
-    while node not in seen:
-        seen[node] = len(seen)
-        node = node.next()
-    return len(seen)-seen[node]
-
-print(
-    lcm(
-        *[
-            cycle_len(Node(start, 0))
-            for start in graph.keys()
-            if start.endswith("A")
-        ]
-    )
-)
+print(solve([label for label in labels if label.endswith("A")]))
@@ -113,25 +113,49 @@
 #
 # Analyze your OASIS report and extrapolate the next value for each
 # history.  What is the sum of these extrapolated values?
+#
+# --------------------
+#
+# The difference engine is linear: if a sequence has n terms, the next
+# value is a fixed binomial-weighted sum of the terms.  (Assuming the
+# n-th differences are zero, which the engine effectively does, gives
+# x[n] = sum over i of (-1)^(n-1-i) * C(n, i) * x[i].)  So we group
+# the sequences by length and precompute a weight vector for each
+# length.  And since we want only the sum of the extrapolated values,
+# we can sum each group's sequences term by term first, leaving a
+# single dot product per group, all in exact integer arithmetic.
+# The column sums are accumulated line by line, so memory is
+# proportional to the lengths of the sequences, not their number.
+#
+# The answers to both parts are printed at the end, though, from the
+# streaming mode described in part 2.
 
+from collections import defaultdict
+from math import comb
 import re
 
-sequences = [
-    [int(v) for v in re.findall(r"-?\d+", line)]
-    for line in open("09.in")
-]
+def forward_weights(n):
+    return [(-1)**(n-1-i) * comb(n, i) for i in range(n)]
 
-def next_value(sequence):
-    diffs = [sequence]
-    while True:
-        a = diffs[-1]
-        b = [a[i+1]-a[i] for i in range(len(a)-1)]
-        if all(v == 0 for v in b):
-            break
-        diffs.append(b)
-    return sum(s[-1] for s in diffs)
+def sum_columns(lines):
+    # Map sequence length to the term-by-term sum of the sequences of
+    # that length.
+    column_sums = defaultdict(list)
+    for line in lines:
+        sequence = [int(v) for v in re.findall(r"-?\d+", line)]
+        sums = column_sums[len(sequence)]
+        if len(sums) == 0:
+            sums.extend(sequence)
+        else:
+            for i, v in enumerate(sequence):
+                sums[i] += v
+    return column_sums
 
-print(sum(next_value(s) for s in sequences))
+def extrapolate(weights_fn, column_sums):
+    return sum(
+        sum(w*s for w, s in zip(weights_fn(n), sums))
+        for n, sums in column_sums.items()
+    )
 
 # --- Part Two ---
 #
@@ -170,6 +194,63 @@ print(sum(next_value(s) for s in sequences))
 #
 # Haha, just reverse the sequences.  We need to subtract at each step
 # instead of add, but by working in reverse all the deltas get
-# negated, so we can stick with adding.
+# negated, so we can stick with adding.  Reversing the sequences is
+# the same as reversing the weights.
+
+def backward_weights(n):
+    return forward_weights(n)[::-1]
+
+# For long sequences there's also a streaming mode, which we use to
+# answer both parts in a single pass over the input.  Terms are parsed
+# lazily, and rather than keeping every row of differences, the engine
+# keeps only the first and last elements of each row, updating the
+# last elements as each new term arrives.  Rows below the first row
+# that is all zeros so far are all zeros too, so they are not stored
+# until a term makes them nonzero.  Memory per sequence is thus
+# proportional to its degree, and the engine bails out if the degree
+# exceeds a given maximum.  The previous value is the alternating sum
+# of the first elements, and the next value the sum of the last.
+#
+# Run with --check to cross-check both parts against the weighted sums.
+
+import sys
+
+def difference_engine(terms, max_degree=None):
+    """Return the (previous, next) extrapolated values of a sequence
+    given as an iterable of terms.
+    """
+    first, last = [], []
+    n = 0  # number of terms so far
+    for x in terms:
+        v = x
+        for k in range(len(last)):
+            last[k], v = v, v-last[k]
+        # Row len(last) was all zeros; extend the rows that v makes
+        # nonzero (their previous elements, if any, were zero).
+        while v != 0 and len(last) <= n:
+            if max_degree != None and len(last) > max_degree:
+                raise ValueError("sequence exceeds maximum degree")
+            first.append(v if len(last) == n else 0)
+            last.append(v)
+        n += 1
+    return sum((-1)**k * f for k, f in enumerate(first)), sum(last)
+
+def stream_sequences(lines):
+    for line in lines:
+        yield (int(m.group()) for m in re.finditer(r"-?\d+", line))
+
+totals = [0, 0]
+for terms in stream_sequences(open("09.in")):
+    for i, v in enumerate(difference_engine(terms)):
+        totals[i] += v
+print(totals[1])
+print(totals[0])
 
-print(sum(next_value(s[::-1]) for s in sequences))
+if "--check" in sys.argv[1:]:
+    column_sums = sum_columns(open("09.in"))
+    weighted = [
+        extrapolate(backward_weights, column_sums),
+        extrapolate(forward_weights, column_sums)
+    ]
+    if totals != weighted:
+        sys.exit(f"weighted sums give {weighted}")
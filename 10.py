@@ -146,8 +146,12 @@
 # adjacent tiles.  For ease of processing we replace the start tile
 # with the appropriate pipe symbol.
 
-grid = [list(line.strip()) for line in open("10.in")]
-R, C = len(grid), len(grid[0])  # grid dimensions
+import sys
+
+grid = bytearray(open("10.in", "rb").read())
+C = grid.index(b"\n")
+grid = grid.replace(b"\n", b"")
+R = len(grid)//C  # grid dimensions R, C
 
 N, S, E, W = 0b0001, 0b0010, 0b0100, 0b1000  # connection directions
 
@@ -162,33 +166,51 @@ connections = {
 }
 snoitcennoc = dict(reversed(pair) for pair in connections.items())
 
-def moves(r, c):
-    # Return a list of the two tiles that are loop-adjacent to the
-    # given tile.
-    m = { N: (-1, 0), S: (1, 0), E: (0, 1), W: (0, -1) }
-    return [
-        (r+dr, c+dc)
-        for direction, (dr, dc) in m.items()
-        if connections[grid[r][c]] & direction != 0
-    ]
+# The grid is kept flat, one byte per tile, indexed by r*C+c, and is
+# translated into a byte string of connection bit masks.  Walking the
+# loop is then a matter of table lookups, each indexed by a direction
+# bit: having moved in direction d onto a pipe, the direction to move
+# next is the pipe's connections minus the one leading back, i.e.,
+# pipes[i] ^ opposite[d].
+#
+# As we trace the loop we mark its tiles in a flat mask, one byte per
+# tile, and accumulate the shoelace sum (twice the signed area of the
+# polygon whose vertices are the loop tiles) for part 2.
+
+table = bytearray(256)
+for symbol, bits in connections.items():
+    table[ord(symbol)] = bits
+
+sr, sc = divmod(grid.index(b"S"), C)
+grid[sr*C+sc] = ord(snoitcennoc[
+    (N if sr > 0   and table[grid[(sr-1)*C+sc  ]]&S != 0 else 0) |
+    (S if sr < R-1 and table[grid[(sr+1)*C+sc  ]]&N != 0 else 0) |
+    (E if sc < C-1 and table[grid[    sr*C+sc+1]]&W != 0 else 0) |
+    (W if sc > 0   and table[grid[    sr*C+sc-1]]&E != 0 else 0)
+])
+pipes = grid.translate(table)
 
-sr = next(filter(lambda r: "S" in grid[r], range(R)))
-sc = grid[sr].index("S")
-grid[sr][sc] = snoitcennoc[
-    (N if sr > 0   and connections[grid[sr-1][  sc]]&S != 0 else 0) |
-    (S if sr < R-1 and connections[grid[sr+1][  sc]]&N != 0 else 0) |
-    (E if sc < C-1 and connections[grid[  sr][sc+1]]&W != 0 else 0) |
-    (W if sc > 0   and connections[grid[  sr][sc-1]]&E != 0 else 0)
-]
+opposite, step, dr, dc = [0]*16, [0]*16, [0]*16, [0]*16
+for d, o, y, x in [(N, S, -1, 0), (S, N, 1, 0), (E, W, 0, 1), (W, E, 0, -1)]:
+    opposite[d], step[d], dr[d], dc[d] = o, y*C+x, y, x
 
-loop = [(sr, sc), moves(sr, sc)[0]]
+on_loop = bytearray(R*C)
+loop_len = 0
+twice_area = 0
+i, r, c = sr*C+sc, sr, sc
+d = pipes[i] & -pipes[i]  # either direction will do
 while True:
-    next_tile = next(filter(lambda t: t != loop[-2], moves(*loop[-1])))
-    if next_tile == loop[0]:
+    on_loop[i] = 1
+    twice_area += r*dc[d] - c*dr[d]
+    loop_len += 1
+    i += step[d]
+    r += dr[d]
+    c += dc[d]
+    d = pipes[i] ^ opposite[d]
+    if i == sr*C+sc:
         break
-    loop.append(next_tile)
 
-print(len(loop)//2)
+print(loop_len//2)
 
 # --- Part Two ---
 #
@@ -331,26 +353,41 @@ print(len(loop)//2)
 # L-*J    | ignore; just skirting the interior
 # L-*7    | crossing
 
-loop = set(loop)
+# The loop is a polygon whose vertices are tile centers, and the tiles
+# enclosed by the loop are exactly the lattice points in its interior.
+# Thus Pick's theorem, A = I + B/2 - 1, where A is the area given by
+# the shoelace formula and B is the number of lattice points on the
+# boundary (the loop length), gives the number of interior tiles I
+# directly.
+#
+# Run with --check to cross-check with the scanline.  The rules above
+# are equivalent to counting a crossing at each loop tile that
+# connects north (|, J, and L).  Treating the whole grid, row after
+# row, as one long bit string, a tile is inside the loop if the number
+# of crossings up to it is odd, i.e., if the prefix XOR of the
+# crossing bits is set.  (Each row has an even number of crossings, so
+# the parity resets at the end of each row on its own.)  The prefix
+# XOR is computed on big integers, doubling the shift each time.
 
-num_inside = 0
-for r in range(R):
-    inside = False
-    prev_bend = None
-    for c in range(C):
-        if (r, c) in loop:
-            if grid[r][c] == "F" or grid[r][c] == "L":
-                prev_bend = grid[r][c]
-            elif (
-                grid[r][c] == "|"
-                or (grid[r][c] == "7" and prev_bend == "L")
-                or (grid[r][c] == "J" and prev_bend == "F")
-            ):
-                inside = not inside
-            else:
-                pass
-        else:
-            if inside:
-                num_inside += 1
+num_inside = abs(twice_area)//2 - loop_len//2 + 1
+
+def to_bits(b, ones):
+    # Convert a sequence of bytes to an integer whose bit i is set if
+    # byte i is in ones.
+    table = bytearray(b"0"*256)
+    for v in ones:
+        table[v] = ord("1")
+    return int(b.translate(table)[::-1], 2)
 
 print(num_inside)
+
+if "--check" in sys.argv[1:]:
+    loop_bits = to_bits(on_loop, [1])
+    crossings = to_bits(grid, b"|JL") & loop_bits
+    parity, shift = crossings, 1
+    while shift < R*C:
+        parity ^= parity << shift
+        shift *= 2
+    scanned = (parity & ~loop_bits & ((1 << R*C) - 1)).bit_count()
+    if scanned != num_inside:
+        sys.exit(f"scanline gives {scanned}")
@@ -122,6 +122,23 @@
 #
 # Expand the universe, then find the length of the shortest path
 # between every pair of galaxies.  What is the sum of these lengths?
+#
+# --------------------
+#
+# Rather than consider every pair of galaxies, we work one axis at a
+# time.  Each row (column) is mapped to its expanded coordinate by
+# adding, for every empty row (column) before it, the expansion factor
+# less one, the count of those empty lines coming from a prefix sum.
+# If the galaxies' coordinates along an axis are sorted, x[0] <= x[1]
+# <= ... <= x[n-1], then the sum of all pairwise distances along that
+# axis is the sum of (2k-n+1)*x[k], since x[k] is added once for each
+# of the k galaxies before it and subtracted once for each of the
+# n-k-1 after.  That's a single pass after sorting.  Moreover, the
+# total is linear in the expansion factor, so we compute the
+# unexpanded distance sum and the sum of empty lines crossed once, and
+# can then answer for any expansion factors at once.
+
+from itertools import accumulate
 
 grid = [line.strip() for line in open("11.in")]
 R, C = len(grid), len(grid[0])  # grid dimensions
@@ -129,27 +146,33 @@ R, C = len(grid), len(grid[0])  # grid dimensions
 G = "#"
 G_list = [(r, c) for r in range(R) for c in range(C) if grid[r][c] == G]
 
-empty_rows = set(r for r in range(R) if G not in grid[r])
-empty_cols = set(
-    c
-    for c in range(C)
-    if not any(grid[r][c] == G for r in range(R))
+def axis_sums(coords, size):
+    # Return the sum over pairs of galaxies of the distance between
+    # them along one axis, and of the number of empty lines between
+    # them.
+    occupied = set(coords)
+    empty_before = [0] + list(
+        accumulate(x not in occupied for x in range(size))
+    )
+    n = len(coords)
+    dist_sum = empty_sum = 0
+    for k, x in enumerate(sorted(coords)):
+        dist_sum += (2*k-n+1)*x
+        empty_sum += (2*k-n+1)*empty_before[x]
+    return dist_sum, empty_sum
+
+dist_sum, empty_sum = map(
+    sum,
+    zip(
+        axis_sums([r for r, _ in G_list], R),
+        axis_sums([c for _, c in G_list], C)
+    )
 )
 
-def solve(expansion_factor):
-    total_dist = 0
-    e = expansion_factor-1
-    for i in range(len(G_list)):
-        for j in range(i+1, len(G_list)):
-            rrange = range(*sorted([G_list[i][0], G_list[j][0]]))
-            crange = range(*sorted([G_list[i][1], G_list[j][1]]))
-            d = abs(G_list[i][0]-G_list[j][0]) + abs(G_list[i][1]-G_list[j][1])
-            d += e*sum(r in empty_rows for r in rrange)
-            d += e*sum(c in empty_cols for c in crange)
-            total_dist += d
-    return total_dist
-
-print(solve(2))
+def solve(expansion_factors):
+    return [dist_sum + (f-1)*empty_sum for f in expansion_factors]
+
+print(*solve([2]))
 
 # --- Part Two ---
 #
@@ -172,4 +195,116 @@ print(solve(2))
 # to these new rules, then find the length of the shortest path
 # between every pair of galaxies.  What is the sum of these lengths?
 
-print(solve(1000000))
+# For live what-if queries we also maintain the totals incrementally
+# in an index that supports adding and removing galaxies, which we use
+# to answer this part.  For each axis, a segment tree over the rows
+# (columns) stores for each node's span of lines: the number of
+# galaxies n, the sum of their coordinates sx, the number of empty
+# lines e, the sum over galaxies of the number of empty lines before
+# them in the span sb, and the two pairwise sums for the galaxies
+# within the span, of distances D and of empty lines crossed M.  Two
+# adjacent spans combine in constant time (see merge below), so adding
+# or removing a galaxy updates one leaf and its O(log n) ancestors,
+# and a line becoming empty or nonempty is accounted for
+# automatically.  A Fenwick tree can't do this, as the pairwise sums
+# don't decompose into prefix sums.
+#
+# The index also keeps a count of the galaxies at each position, and
+# rejects (with ValueError) positions off the image and removals of
+# galaxies that aren't there, either of which would otherwise silently
+# corrupt the trees.
+#
+# Run with --check to cross-check both expansion factors against the
+# direct sums above.
+
+from collections import Counter
+import sys
+
+class Axis:
+
+    def __init__(self, size, coords=()):
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.counts = [0]*size
+        for x in coords:
+            self._check(x)
+            self.counts[x] += 1
+        self.tree = [(0, 0, 0, 0, 0, 0)]*(2*self.size)
+        for x in range(size):
+            self.tree[self.size+x] = self._leaf(x)
+        for i in range(self.size-1, 0, -1):
+            self.tree[i] = merge(self.tree[2*i], self.tree[2*i+1])
+
+    def _leaf(self, x):
+        n = self.counts[x]
+        return (n, n*x, 1 if n == 0 else 0, 0, 0, 0)
+
+    def _check(self, x):
+        if not 0 <= x < len(self.counts):
+            raise ValueError(f"coordinate {x} out of range")
+
+    def update(self, x, delta):
+        self._check(x)
+        if self.counts[x]+delta < 0:
+            raise ValueError(f"no galaxy at coordinate {x}")
+        self.counts[x] += delta
+        i = self.size+x
+        self.tree[i] = self._leaf(x)
+        while i > 1:
+            i //= 2
+            self.tree[i] = merge(self.tree[2*i], self.tree[2*i+1])
+
+    def sums(self):
+        # Return (D, M) for all galaxies.
+        return self.tree[1][4:]
+
+def merge(a, b):
+    nA, sxA, eA, sbA, DA, MA = a
+    nB, sxB, eB, sbB, DB, MB = b
+    return (
+        nA+nB,
+        sxA+sxB,
+        eA+eB,
+        sbA + sbB + nB*eA,
+        DA + DB + nA*sxB - nB*sxA,
+        MA + MB + nB*(nA*eA - sbA) + nA*sbB
+    )
+
+class GalaxyIndex:
+
+    def __init__(self, R, C, galaxies=()):
+        self.galaxies = Counter(galaxies)
+        self.axes = [
+            Axis(R, [r for r, _ in self.galaxies.elements()]),
+            Axis(C, [c for _, c in self.galaxies.elements()])
+        ]
+
+    def add(self, r, c):
+        # Check both coordinates before touching either axis.
+        for axis, x in zip(self.axes, (r, c)):
+            axis._check(x)
+        self.galaxies[r, c] += 1
+        self.axes[0].update(r, 1)
+        self.axes[1].update(c, 1)
+
+    def remove(self, r, c):
+        if self.galaxies[r, c] == 0:
+            raise ValueError(f"no galaxy at {(r, c)}")
+        self.galaxies[r, c] -= 1
+        self.axes[0].update(r, -1)
+        self.axes[1].update(c, -1)
+
+    def total(self, expansion_factor):
+        return sum(
+            D + (expansion_factor-1)*M
+            for D, M in (axis.sums() for axis in self.axes)
+        )
+
+index = GalaxyIndex(R, C, G_list)
+print(index.total(1000000))
+
+if "--check" in sys.argv[1:]:
+    factors = [2, 1000000]
+    if [index.total(f) for f in factors] != solve(factors):
+        sys.exit(f"direct sums give {solve(factors)}")
@@ -124,9 +124,27 @@
 # For each row, count all of the different arrangements of operational
 # and broken springs that meet the given criteria.  What is the sum of
 # those counts?
+#
+# --------------------
+#
+# We count arrangements by dynamic programming over (position in the
+# pattern, index into the list of numbers).  Let ways[j][i] be the
+# number of ways of placing numbers j, j+1, ... in pattern[i:].  At
+# position i we can either leave the spring operational (if it isn't
+# #), or start a run of nums[j] damaged springs there (if the run fits,
+# contains no ., and isn't followed by a #), skipping past the run and
+# its trailing spacer character.  With prefix counts of . characters,
+# checking whether a run fits is a constant time operation.  We fill
+# the table from the end of the pattern and the end of the number
+# list, keeping just two rows of it at a time, so memory is linear in
+# the pattern length and nothing is retained between patterns.
+#
+# Rows are independent, so they are distributed in chunks over a pool
+# of worker processes, and the workers' counts are summed at the end.
+# Where forking isn't available, the rows are counted serially.
 
-from functools import lru_cache
-import re
+from itertools import accumulate, starmap
+from multiprocessing import cpu_count, get_all_start_methods, get_context
 
 conditions = []
 for line in open("12.in"):
@@ -134,26 +152,32 @@ for line in open("12.in"):
     nums = tuple(int(v) for v in nums.split(","))
     conditions.append((pattern, nums))
 
-@lru_cache(maxsize=None)
 def num_matches(pattern, nums):
-    if len(nums) == 0:
-        return 1 if re.match("[.?]*$", pattern) else 0
-    n = nums[0]
-    # We focus on fitting just the first number (and its trailing
-    # spacer character).  The remaining numbers will require a number
-    # of characters equal to their sum plus an additional trailing
-    # spacer character for each, leaving us with `w` characters to
-    # work with for the first number.
-    if not pattern.endswith("."):
-        pattern += "."
-    w = len(pattern) - (sum(nums[1:]) + len(nums)-1)
-    return sum(
-        num_matches(pattern[i+n+1:], nums[1:])
-        for i in range(w-n)
-        if re.match("[.?]{%d}[#?]{%d}[.?]" % (i, n), pattern)
-    )
+    L = len(pattern)
+    dots = [0] + list(accumulate(c == "." for c in pattern))
+    # Row for j = len(nums): no numbers left, so no # may remain.
+    ways = [0]*(L+1)
+    ways[L] = 1
+    for i in range(L-1, -1, -1):
+        ways[i] = ways[i+1] if pattern[i] != "#" else 0
+    for n in reversed(nums):
+        next_ways = ways
+        ways = [0]*(L+1)
+        for i in range(L-n, -1, -1):
+            w = ways[i+1] if pattern[i] != "#" else 0
+            if dots[i+n] == dots[i] and (i+n == L or pattern[i+n] != "#"):
+                w += next_ways[min(i+n+1, L)]
+            ways[i] = w
+    return ways[0]
+
+def total_matches(conditions, fn=num_matches):
+    if "fork" not in get_all_start_methods():
+        return sum(starmap(fn, conditions))
+    processes = max(1, min(len(conditions), cpu_count()))
+    with get_context("fork").Pool(processes) as pool:
+        return sum(pool.starmap(fn, conditions))
 
-print(sum(num_matches(pattern, nums) for pattern, nums in conditions))
+print(total_matches(conditions))
 
 # --- Part Two ---
 #
@@ -194,10 +218,88 @@ print(sum(num_matches(pattern, nums) for pattern, nums in conditions))
 #
 # Unfold your condition records; what is the new sum of possible
 # arrangement counts?
+#
+# --------------------
+#
+# Rather than construct the unfolded records, whose length grows with
+# the unfolding factor, we compile the list of numbers into a small
+# nondeterministic automaton and run the record through it.  The
+# automaton's states correspond to the characters of the string
+# ".###.##." (for numbers 3 and 2, say): a . state loops on operational
+# springs and advances on a damaged one, and a # state advances on a
+# damaged spring if followed by another # state, or on an operational
+# spring if followed by a . state.  A record matches if it ends in
+# either of the last two states.
+#
+# The unfolded list of numbers is just the base list repeated, so the
+# automaton for it is the base automaton's states repeated: state t
+# (counting from -1, the initial . state) behaves according to
+# position t modulo the base length.  Thus the effect of feeding one
+# copy of the record through the automaton depends only on the
+# starting position modulo the base length, and we precompute, for
+# each such position, the number of ways of advancing by each number
+# of states.  We then propagate a vector of counts over the states one
+# record copy at a time, keeping only states from which the remaining
+# copies can still reach a final state.  Nothing of unfolded size is
+# built but the count vector.
+#
+# The vector can hold O(factor * len(pattern)) states, so the cost is
+# O(factor^2 * len(pattern)^2) big integer operations in the worst
+# case, on counts that themselves grow to O(factor * len(pattern))
+# bits.  This is quick for the factor of 5 here, and factors of 100 or
+# so take a fraction of a second per record, but patterns with many ?
+# characters become slow at factors in the thousands.  Counts are
+# cached for repeated queries.
+
+from collections import defaultdict
+from functools import lru_cache
 
-conditions = [
-    ("?".join([pattern]*5), nums*5)
-    for pattern, nums in conditions
-]
+@lru_cache(maxsize=4096)
+def num_unfolded_matches(pattern, nums, factor):
+    base = "".join("#"*n + "." for n in nums)
+    if len(base) == 0:
+        return 0 if "#" in pattern else 1
+    B = len(base)
+    def transfer(chars, o):
+        # Return the (advance, count) pairs that result from feeding
+        # characters to the automaton starting at position o.
+        counts = {0: 1}
+        for c in chars:
+            next_counts = defaultdict(int)
+            for r, w in counts.items():
+                if base[(o+r)%B] == ".":
+                    if c != "#":
+                        next_counts[r] += w
+                    if c != ".":
+                        next_counts[r+1] += w
+                elif c != ("." if base[(o+r+1)%B] == "#" else "#"):
+                    next_counts[r+1] += w
+            counts = next_counts
+        return sorted(counts.items())
+    middle = [transfer(pattern + "?", o) for o in range(B)]
+    last = [transfer(pattern, o) for o in range(B)]
+    advances = [d for T in middle + last for d, _ in T]
+    if len(advances) == 0:
+        return 0
+    min_advance, max_advance = min(advances), max(advances)
+    end = B*factor - 1  # the final . state
+    counts = {-1: 1}
+    for copy in range(factor):
+        T = middle if copy < factor-1 else last
+        copies_left = factor-1 - copy
+        lo = end-1 - copies_left*max_advance
+        hi = end - copies_left*min_advance
+        next_counts = defaultdict(int)
+        for t, w in counts.items():
+            for d, x in T[t%B]:
+                if lo <= t+d <= hi:
+                    next_counts[t+d] += w*x
+        counts = next_counts
+    return counts.get(end, 0) + counts.get(end-1, 0)
 
-print(sum(num_matches(pattern, nums) for pattern, nums in conditions))
+print(
+    total_matches(
+        [(pattern, nums, 5) for pattern, nums in conditions],
+        fn=num_unfolded_matches
+    )
+)
@@ -94,42 +94,75 @@
 #
 # Find the line of reflection in each of the patterns in your notes.
 # What number do you get after summarizing all of your notes?
+#
+# --------------------
+#
+# Each grid is encoded as integer bit masks, one per row (bit c set if
+# column c is #) and one per column (bit r set if row r is #), so the
+# Hamming distance between two rows or two columns is the bit count of
+# their XOR.  For each grid we compute, once, the profile of Hamming
+# distances that result from reflecting it about each candidate line,
+# summing the distances between pairs of rows (columns) working
+# outward from the line.  A Hamming distance of 0 indicates a perfect
+# reflection.  The profiles are cached, so summaries for any number of
+# smudge counts are answered without rescanning the grids.  (Computing
+# full profiles means we can't abandon a line early once its distance
+# exceeds the target, but each grid is scanned only once.)  A grid
+# with no line of reflection at the target distance contributes 0 to
+# the summary.
+
+from functools import lru_cache
 
 grids = []
 for s in open("13.in").read().split("\n\n"):
     g = s.split()
-    gT = [
-        "".join(g[r][c] for r in range(len(g)))
-        for c in range(len(g[0]))
-    ]
-    grids.append((g, gT))
+    rows, cols = [0]*len(g), [0]*len(g[0])
+    for r, line in enumerate(g):
+        for c, ch in enumerate(line):
+            if ch == "#":
+                rows[r] |= 1 << c
+                cols[c] |= 1 << r
+    grids.append((tuple(rows), tuple(cols)))
 
-def hamming_distances(grid):
+@lru_cache(maxsize=None)
+def hamming_distances(masks):
     # Return a list of the Hamming distances that result from
-    # reflecting the grid between each pair of rows, beginning with a
-    # line of reflection between rows 0 and 1.  A Hamming distance of
-    # 0 indicates a perfect reflection.
+    # reflecting between each pair of rows (columns), beginning with a
+    # line of reflection between rows 0 and 1.
     return [
         sum(
-            grid[r-1-k][c] != grid[r+k][c]
-            for k in range(min(len(grid)-r, r))
-            for c in range(len(grid[0]))
+            (masks[r-1-k] ^ masks[r+k]).bit_count()
+            for k in range(min(len(masks)-r, r))
         )
-        for r in range(1, len(grid))
+        for r in range(1, len(masks))
     ]
 
-def solve(target_distance):
-    n = 0
-    for g, gT in grids:
-        hds = hamming_distances(g)
-        if target_distance in hds:
-            n += 100*(hds.index(target_distance)+1)
-        else:
-            hds = hamming_distances(gT)
-            n += hds.index(target_distance)+1
-    return n
+def first_line(masks, target_distance):
+    # Return the number of rows (columns) before the first line of
+    # reflection at the target distance, or None.
+    return next(
+        (
+            r
+            for r, d in enumerate(hamming_distances(masks), start=1)
+            if d == target_distance
+        ),
+        None
+    )
+
+def solve(target_distances):
+    # Return the summary for each target distance.
+    summaries = []
+    for target in target_distances:
+        n = 0
+        for rows, cols in grids:
+            if (r := first_line(rows, target)) != None:
+                n += 100*r
+            elif (c := first_line(cols, target)) != None:
+                n += c
+        summaries.append(n)
+    return summaries
 
-print(solve(0))
+print(*solve([0]))
 
 # --- Part Two ---
 #
@@ -204,4 +237,4 @@ print(solve(0))
 # reflection.  What number do you get after summarizing the new
 # reflection line in each pattern in your notes?
 
-print(solve(1))
+print(*solve([1]))
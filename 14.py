@@ -79,48 +79,55 @@
 #
 # Tilt the platform so that the rounded rocks all roll north.
 # Afterward, what is the total load on the north support beams?
+#
+# --------------------
+#
+# The platform is stored as a flat bytearray, row after row.  Each
+# column (for north and south tilts) and each row (for west and east
+# tilts) is divided into segments by the cube-shaped rocks, and the
+# segments are precomputed as slices of the bytearray.  Tilting is
+# then just a matter of counting the rounded rocks in each segment and
+# rewriting the segment with that many rounded rocks packed at the end
+# the platform is tilted toward, all done with slice operations.
 
 def load_grid():
-    # Return (square) grid and common side length.
-    grid = {
-        (r, c): v
-        for r, line in enumerate(open("14.in"))
-        for c, v in enumerate(line.strip())
-    }
-    max_r = max(r for r, c in grid.keys())
-    max_c = max(c for r, c in grid.keys())
-    assert max_r == max_c
-    return (grid, max_r+1)
+    # Return grid and dimensions.
+    lines = [line.strip() for line in open("14.in")]
+    return bytearray("".join(lines).encode()), len(lines), len(lines[0])
+
+grid, R, C = load_grid()
 
-grid, D = load_grid()
+def find_segments(starts, stride, length):
+    # Return the segments between cube-shaped rocks along lines
+    # beginning at the given starting indices, stepping by stride, as
+    # (slice, length) tuples.
+    segments = []
+    for start in starts:
+        i = start
+        for k in range(length+1):
+            end = start + k*stride
+            if k == length or grid[end] == ord("#"):
+                if end > i:
+                    segments.append((slice(i, end, stride), (end-i)//stride))
+                i = end + stride
+    return segments
+
+segments = {
+    "NS": find_segments(range(C), C, R),
+    "WE": find_segments(range(0, R*C, C), 1, C)
+}
 
 def tilt(direction="N"):
-    # Tilt the platform, modifying `grid`.  The code below is written
-    # to always tilt to the north; tilting in other directions is
-    # achieved by using a coordinate transformation.
-    coord_xforms = {
-        "N": lambda r, c: (r, c),
-        "W": lambda r, c: (c, r),
-        "S": lambda r, c: (D-r-1, c),
-        "E": lambda r, c: (c, D-r-1)
-    }
-    m = coord_xforms[direction]
-    for r in range(D):
-        for c in range(D):
-            if grid[m(r, c)] == "O":
-                nr = r-1
-                while nr >= 0 and grid[m(nr, c)] == ".":
-                    nr -= 1
-                # At this point, position (nr, c) is either off the
-                # platform or the position of a block.
-                grid[m(r, c)] = "."
-                grid[m(nr+1, c)] = "O"
+    # Tilt the platform, modifying `grid`.
+    for s, n in segments["NS" if direction in "NS" else "WE"]:
+        k = grid[s].count(b"O")
+        if direction in "NW":
+            grid[s] = b"O"*k + b"."*(n-k)
+        else:
+            grid[s] = b"."*(n-k) + b"O"*k
 
 def north_beam_load():
-    return sum(
-        sum(grid[(r, c)] == "O" for c in range(D)) * (D-r)
-        for r in range(D)
-    )
+    return sum(grid.count(b"O", r*C, (r+1)*C) * (R-r) for r in range(R))
 
 tilt()
 print(north_beam_load())
@@ -188,22 +195,32 @@ print(north_beam_load())
 #
 # Run the spin cycle for 1000000000 cycles.  Afterward, what is the
 # total load on the north support beams?
+#
+# --------------------
+#
+# To detect when the spin cycle starts repeating, we record each
+# platform state in a dictionary, keyed by a bitmap of the rounded
+# rocks packed into an integer, along with its north beam load.
 
-grid, D = load_grid()
+grid, R, C = load_grid()
 
 def cycle():
     for direction in ["N", "W", "S", "E"]:
         tilt(direction)
 
-path = [grid.copy()]
+bits = bytearray(b"0"*256)
+bits[ord("O")] = ord("1")
+
+seen = {}  # rock bitmap -> number of cycles
+loads = []
 while True:
-    cycle()
-    if grid in path:
-        i = path.index(grid)
+    key = int(grid.translate(bits), 2)
+    if key in seen:
+        i = seen[key]
         break
-    path.append(grid.copy())
-
-cycle_len = len(path)-i
-grid = path[(1000000000-i)%cycle_len+i]
+    seen[key] = len(loads)
+    loads.append(north_beam_load())
+    cycle()
 
-print(north_beam_load())
+cycle_len = len(loads)-i
+print(loads[(1000000000-i)%cycle_len+i])